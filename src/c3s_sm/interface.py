@@ -27,10 +27,8 @@ images as well as for timeseries generated using this module
 
 import pandas as pd
 import os
-import netCDF4 as nc
 import numpy as np
-from datetime import timedelta
-from dateutil.relativedelta import relativedelta
+from functools import lru_cache
 from netCDF4 import num2date
 
 from smecv_grid.grid import SMECV_Grid_v052
@@ -43,18 +41,99 @@ import warnings
 from netCDF4 import Dataset
 from pynetcf.time_series import GriddedNcOrthoMultiTs
 from datetime import datetime
-from parse import parse
-from cadati.dekad import dekad_index, dekad_startdate_from_date
-
-try:
-    import xarray as xr
-    xr_supported = True
-except ImportError:
-    xr_supported = False
+from string import Formatter
+from parse import Parser
+from cadati.dekad import dekad_index
 
 fntempl = "C3S-SOILMOISTURE-L3S-SSM{unit}-{prod}-{temp}-{datetime}-{cdr}-{vers}.{subvers}.nc"
 
 
+@lru_cache(maxsize=None)
+def c3s_grid(subset_flag=None):
+    """
+    Load the 0.25 degree SMECV grid that the C3S images are stored on.
+    Creating the grid is expensive, therefore it is only done once per
+    subset flag, subsequent calls return the cached grid.
+
+    Parameters
+    ----------
+    subset_flag : str, optional (default: None)
+        Name of the subset to activate, e.g. 'land'. If None is passed,
+        all points of the global grid are active.
+
+    Returns
+    -------
+    grid : SMECV_Grid_v052
+        The cached grid object. Its arrays (coordinates, gpis, cells) are
+        read-only, as they are shared by all readers (and e.g. passed on as
+        image coordinates). Use c3s_grid.cache_clear() to reset the cache
+        if necessary.
+    """
+    grid = SMECV_Grid_v052(subset_flag)
+    for arr in vars(grid).values():
+        if isinstance(arr, np.ndarray):
+            arr.setflags(write=False)
+
+    return grid
+
+
+def _template_affixes(template) -> (str, str):
+    """
+    Get the fixed start and end of a file name template, to skip files that
+    can not match the template before parsing them. Both are lower case, as
+    parse matches case insensitive.
+
+    Parameters
+    ----------
+    template : str
+        File name template, e.g. fntempl.
+
+    Returns
+    -------
+    prefix : str
+        Lower case text before the first field of the template.
+    suffix : str
+        Lower case text after the last field of the template.
+    """
+    # literal text is unescaped ({{ -> {) and split at escaped braces, the
+    # affixes may then be shorter than the fixed text, but never wrong
+    parts = list(Formatter().parse(template))
+    prefix = parts[0][0] if parts else ''
+    suffix = parts[-1][0] if parts and parts[-1][1] is None else ''
+
+    return prefix.lower(), suffix.lower()
+
+
+def _replace_values(arr, to_replace) -> np.ndarray:
+    """
+    Replace values in an array, e.g. fill values with nan. The array is
+    changed in place, and only upcast (e.g. from int to float) if a
+    replacement value does not fit into the original dtype.
+
+    Parameters
+    ----------
+    arr : np.ndarray
+        Array to replace values in.
+    to_replace : dict
+        Values to replace (keys) and their replacements (values).
+
+    Returns
+    -------
+    arr : np.ndarray
+        Array with replaced values.
+    """
+    for val, repl in to_replace.items():
+        hit = np.ma.getdata(arr) == val
+        if not hit.any():
+            continue
+        repl_dtype = np.asarray(repl).dtype
+        if not np.can_cast(repl_dtype, arr.dtype, casting='same_kind'):
+            arr = arr.astype(np.promote_types(arr.dtype, repl_dtype))
+        arr[hit] = repl
+
+    return arr
+
+
 class C3SImg(ImageBase):
     """
     Class to read a single C3S image (for one time stamp)
@@ -63,9 +142,10 @@ class C3SImg(ImageBase):
                  filename,
                  parameters=None,
                  mode='r',
-                 subgrid=SMECV_Grid_v052(None),
+                 subgrid=None,
                  flatten=False,
-                 fillval=None):
+                 fillval=None,
+                 index_cache=None):
         """
         Parameters
         ----------
@@ -76,9 +156,10 @@ class C3SImg(ImageBase):
             If None are passed, all are read.
         mode : str, optional (default: 'r')
             Netcdf file mode, choosing something different to r may delete data.
-        subgrid : SMECV_Grid_v052
+        subgrid : SMECV_Grid_v052, optional (default: None)
             A subgrid of points to read. All other GPIS are masked (2d reading)
-            or ignored (when flattened).
+            or ignored (when flattened). If None is passed, the global grid
+            is used.
         flatten: bool, optional (default: False)
             If set then the data is read into 1D arrays. This is used to e.g
             reshuffle the data for a subset of points.
@@ -87,6 +168,12 @@ class C3SImg(ImageBase):
             set for each parameter individually, otherwise it applies to all.
             Note that choosing np.nan can lead to a change in dtype for some
             (int) parameters. None will use the fill value from the netcdf file
+        index_cache : dict, optional (default: None)
+            Dict to store the index of the subgrid in the image in. Readers
+            can share it, so that the index for a subgrid is computed only
+            once (e.g. for all images of a C3S_Nc_Img_Stack). Entries are
+            stored per subgrid object, readers of different subgrids can use
+            the same dict. By default the index is only kept for this reader.
         """
         self.path = os.path.dirname(filename)
         self.fname = os.path.basename(filename)
@@ -95,13 +182,15 @@ class C3SImg(ImageBase):
 
         if parameters is None:
             parameters = []
-        if type(parameters) != list:
+        elif isinstance(parameters, str):
             parameters = [parameters]
+        else:
+            parameters = list(parameters)
 
         self.parameters = parameters
 
-        self.subgrid = subgrid # subset to read
-        self.grid = SMECV_Grid_v052(None) # global input image
+        self.grid = c3s_grid(None) # global input image
+        self.subgrid = self.grid if subgrid is None else subgrid # subset to read
 
         self.flatten = flatten
 
@@ -109,6 +198,9 @@ class C3SImg(ImageBase):
         self.img = None  # to be loaded
         self.glob_attrs = None
 
+        # index of the subgrid in the image, created on first read
+        self._index_cache = {} if index_cache is None else index_cache
+
         if isinstance(fillval, dict):
             self.fillval = fillval
             for p in self.parameters:
@@ -117,9 +209,11 @@ class C3SImg(ImageBase):
         else:
             self.fillval ={p: fillval for p in self.parameters}
 
-    def _read_flat_img(self) -> (dict, dict, dict, datetime):
+    def _read_img(self) -> (dict, dict, dict, datetime):
         """
-        Reads a single C3S image, flat with gpi0 as first element
+        Reads a single C3S image. Each variable is masked / reduced to the
+        subgrid directly after reading it, so that not all full images have
+        to be kept in memory at the same time.
         """
         with Dataset(self.filename, mode='r') as ds:
             timestamp = num2date(ds['time'], ds['time'].units,
@@ -138,40 +232,39 @@ class C3SImg(ImageBase):
                                    if k not in ds.dimensions.keys()]
 
             parameters = list(self.parameters)
+            variables, fillval = ds.variables, self.fillval
 
             for parameter in parameters:
-                metadata = {}
-                param = ds.variables[parameter]
-                data = param[:][0] # there is only 1 time stamp in the image
+                param = variables[parameter]
+                data = param[0, :, :] # there is only 1 time stamp in the image
 
                 self.shape = (data.shape[0], data.shape[1])
 
                 # read long name, FillValue and unit
-                for attr in param.ncattrs():
-                    metadata[attr] = param.getncattr(attr)
-
-                if parameter in self.fillval:
-                    if self.fillval[parameter] is None:
-                        self.fillval[parameter] = data.fill_value
-
-                    common_dtype = np.find_common_type(
-                        array_types=[data.dtype],
-                        scalar_types=[type(self.fillval[parameter])])
-                    self.fillval[parameter] = np.array([self.fillval[parameter]],
-                                                       dtype=common_dtype)[0]
-
-                    data = data.astype(common_dtype)
-                    data = data.filled(self.fillval[parameter])
+                metadata = param.__dict__  # new dict of all attributes
+
+                if parameter in fillval:
+                    if fillval[parameter] is None:
+                        fillval[parameter] = data.fill_value
+
+                    # only upcast if the fill value does not fit into the dtype
+                    fill_dtype = np.asarray(fillval[parameter]).dtype
+                    if np.can_cast(fill_dtype, data.dtype, casting='same_kind'):
+                        common_dtype = data.dtype
+                    else:
+                        common_dtype = np.promote_types(data.dtype, fill_dtype)
+                    fillval[parameter] = common_dtype.type(fillval[parameter])
+
+                    # filled() creates a copy anyway, avoid a second one
+                    data = data.astype(common_dtype, copy=False)
+                    data = data.filled(fillval[parameter])
                 else:
-                    self.fillval[parameter] = data.fill_value
+                    fillval[parameter] = data.fill_value
                     data = data.filled()
 
-                data = np.flipud(data)
-                data = data.flatten()
-
                 metadata['image_missing'] = 0
 
-                param_img[parameter] = data
+                param_img[parameter] = self._mask_and_reshape(parameter, data)
                 param_meta[parameter] = metadata
 
             global_attrs = ds.__dict__
@@ -179,8 +272,54 @@ class C3SImg(ImageBase):
 
         return param_img, param_meta, global_attrs, timestamp
 
+    def _subgrid_index(self) -> dict:
+        """
+        Get the indices of the active subgrid points in the flattened file
+        image (for flattened reading), or the mask of inactive points in the
+        (flipped) 2d image, where gpi0 is the first element, and the row and
+        column slices and coordinates of the bounding box around the subgrid
+        (for 2d reading). These only depend on the subgrid, they are computed
+        on first access and then taken from the index cache.
+        """
+        # the subgrid is kept in the entry, so its id is not reused while
+        # the entry exists
+        key = (id(self.subgrid), self.shape, self.flatten)
+        index = self._index_cache.get(key)
+        if index is not None and index['subgrid'] is self.subgrid:
+            return index
+
+        n_rows, n_cols = self.shape
+        # gpis start at the lower left corner, the file image at the upper left
+        rows, cols = np.divmod(self.subgrid.activegpis, n_cols)
+
+        if self.flatten:
+            index = {'active_idx': (n_rows - 1 - rows) * n_cols + cols}
+        else:
+            # grid points are unique, this allows a faster set comparison
+            inactive_mask = ~np.isin(self.grid.gpis, self.subgrid.activegpis,
+                                     assume_unique=True).reshape(self.shape)
+            r, c = (slice(rows.min(), rows.max() + 1),
+                    slice(cols.min(), cols.max() + 1))
+            # coordinates of the bbox (north up), as views on the grid
+            index = {'inactive_mask': inactive_mask,
+                     'bbox': (r, c),
+                     'bbox_lonlat': (
+                         self.grid.arrlon.reshape(*self.shape)[r, c],
+                         np.flipud(self.grid.arrlat.reshape(*self.shape)[r, c]))}
+
+        # shared between readers
+        for arr in index.values():
+            if isinstance(arr, np.ndarray):
+                arr.setflags(write=False)
+
+        index['subgrid'] = self.subgrid
+        self._index_cache[key] = index
+
+        return index
+
     def _mask_and_reshape(self,
-                          data: dict) -> dict:
+                          param: str,
+                          data: np.ndarray) -> np.ndarray:
         """
         Takes the grid and drops points that are not active.
         for flattened arrays that means that only the active gpis are kept.
@@ -188,38 +327,29 @@ class C3SImg(ImageBase):
 
         Parameters
         ----------
-        data: dict
-            Variable names and flattened image data.
-        shape_2d : tuple
-            2d shape of the original image.
+        param: str
+            Name of the variable, to look up the fill value.
+        data: np.ndarray
+            2d image data as stored in the file.
 
         Returns
         -------
-        dat : dict
+        dat : np.ndarray
             Masked, reshaped data.
         """
 
-        # check if flatten. if flatten, dont crop and dont reshape
-        # if not flatten, reshape based on grid shape.
+        index = self._subgrid_index()
 
         # select active gpis
-        for param, dat in data.items():
-            if self.flatten:
-                dat = dat[self.subgrid.activegpis]
-            else:
-                exclude = (~np.isin(self.grid.gpis, self.subgrid.activegpis))
-                dat[exclude] = self.fillval[param]
-                if len(self.shape) != 2:
-                    raise ValueError(
-                        "Reading 2d image needs grid with 2d shape"
-                        "You can either use the global grid without subsets,"
-                        "or make sure that you create a subgrid from bbox in"
-                        "an area where no gpis are missing.")
-                dat = dat.reshape(self.shape)
-
-            data[param] = dat
+        if self.flatten:
+            # gather the active gpis directly from the file image
+            dat = data.ravel().take(index['active_idx'])
+        else:
+            # flipped view, gpi0 is the first element
+            dat = np.flipud(data)
+            dat[index['inactive_mask']] = self.fillval[param]
 
-        return data
+        return dat
 
     def read(self, timestamp=None):
         """
@@ -232,16 +362,14 @@ class C3SImg(ImageBase):
             the time stamp from the loaded file and must match
         """
 
-        data, var_meta, glob_meta, img_timestamp = self._read_flat_img()
+        # when flattened, this drops already all non-active gpis
+        data, var_meta, glob_meta, img_timestamp = self._read_img()
 
         if timestamp is not None:
             if img_timestamp is None:
                 img_timestamp = timestamp
             assert img_timestamp == timestamp, "Time stamps do not match"
 
-        # when flattened, this drops already all non-active gpis
-        data = self._mask_and_reshape(data)
-
         if self.flatten:
             return Image(self.subgrid.activearrlon,
                          self.subgrid.activearrlat,
@@ -250,22 +378,12 @@ class C3SImg(ImageBase):
                          timestamp)
         else:
             # also cut 2d case to active area
-            min_lat, min_lon = self.subgrid.activearrlat.min(), \
-                               self.subgrid.activearrlon.min()
-            max_lat, max_lon = self.subgrid.activearrlat.max(), \
-                               self.subgrid.activearrlon.max()
-
-            corners = self.grid.gpi2rowcol([
-                self.grid.find_nearest_gpi(min_lon, min_lat)[0], # llc
-                self.grid.find_nearest_gpi(max_lon, min_lat)[0], # lrc
-                self.grid.find_nearest_gpi(max_lon, max_lat)[0], # urc
-                ])
-
-            rows = slice(corners[0][0], corners[0][2] + 1)
-            cols = slice(corners[1][0], corners[1][1] + 1)
-
-            return Image(self.grid.arrlon.reshape(*self.shape)[rows, cols],
-                         np.flipud(self.grid.arrlat.reshape(*self.shape)[rows, cols]),
+            index = self._subgrid_index()
+            rows, cols = index['bbox']
+            lon, lat = index['bbox_lonlat']
+
+            return Image(lon,
+                         lat,
                          {k: np.flipud(v[rows, cols]) for k, v in data.items()},
                          var_meta,
                          timestamp)
@@ -287,7 +405,7 @@ class C3S_Nc_Img_Stack(MultiTemporalImageBase):
     def __init__(self,
                  data_path,
                  parameters='sm',
-                 subgrid=SMECV_Grid_v052(None),
+                 subgrid=None,
                  flatten=False,
                  solve_ambiguity='sort_last',
                  fntempl=fntempl,
@@ -300,8 +418,8 @@ class C3S_Nc_Img_Stack(MultiTemporalImageBase):
             Path to directory where C3S images are stored
         parameters : list or str,  optional (default: 'sm')
             Variables to read from the image files.
-        grid : pygeogrids.CellGrid, optional (default: SMECV_Grid_v052(None)
-            Subset of the image to read
+        subgrid : pygeogrids.CellGrid, optional (default: None)
+            Subset of the image to read, None to read the global image.
         array_1D : bool, optional (default: False)
             Flatten the read image to a 1D array instead of a 2D array
         solve_ambiguity : str, optional (default: 'latest')
@@ -326,10 +444,12 @@ class C3S_Nc_Img_Stack(MultiTemporalImageBase):
         """
 
         self.data_path = data_path
+        # the subgrid index is the same for all images, share it
         ioclass_kwargs = {'parameters': parameters,
                           'subgrid': subgrid,
                           'flatten': flatten,
-                          'fillval': fillval}
+                          'fillval': fillval,
+                          'index_cache': {}}
 
         self.fname_args = self._parse_filename(fntempl)
         self.solve_ambiguity = solve_ambiguity
@@ -402,9 +522,16 @@ class C3S_Nc_Img_Stack(MultiTemporalImageBase):
             Parsed content of filename string from filename template.
         """
 
+        parser = Parser(template)
+        # fixed start and end of the template, to skip other files quickly
+        prefix, suffix = _template_affixes(template)
+
         for curr, subdirs, files in os.walk(self.data_path):
             for f in files:
-                file_args = parse(template, f)
+                fname = f.lower()
+                if not (fname.startswith(prefix) and fname.endswith(suffix)):
+                    continue
+                file_args = parser.parse(f)
                 if file_args is None:
                     continue
                 else:
@@ -434,16 +561,18 @@ class C3S_Nc_Img_Stack(MultiTemporalImageBase):
         """
 
         if self.fname_args['temp'] == 'MONTHLY':
-            timestamps = pd.date_range(start_date, end_date, freq='MS').to_pydatetime()
+            timestamps = pd.date_range(start_date, end_date, freq='MS')
         elif self.fname_args['temp'] == 'DAILY':
-            timestamps = pd.date_range(start_date, end_date, freq='D').to_pydatetime()
+            timestamps = pd.date_range(start_date, end_date, freq='D')
         elif self.fname_args['temp'] == 'DEKADAL':
-            timestamps = dekad_index(start_date, end_date).to_pydatetime()
-            timestamps = [dekad_startdate_from_date(d) for d in timestamps]
+            dekads = dekad_index(start_date, end_date)
+            # dekads start on the 1st, 11th and 21st of each month
+            start_day = np.select([dekads.day <= 10, dekads.day <= 20], [1, 11], 21)
+            timestamps = dekads - pd.to_timedelta(dekads.day - start_day, unit='D')
         else:
             raise NotImplementedError
 
-        return timestamps
+        return timestamps.to_pydatetime().tolist()
 
     def read(self, timestamp, **kwargs):
         """
@@ -538,11 +667,18 @@ class C3STs(GriddedNcOrthoMultiTs):
         if ts is None:
             return None
 
-        if self.remove_nans:
-            if self.remove_nans == True:
-                ts = ts.replace(-9999.0000, np.nan)
-            else:
-                ts = ts.replace(self.remove_nans)
+        remove_nans = self.remove_nans
+        if remove_nans:
+            if remove_nans == True:
+                remove_nans = dict.fromkeys(ts.columns, {-9999.: np.nan})
+            # only copy and replace columns that contain a value to
+            # replace, a column is only upcast if a value is replaced
+            for var, to_replace in remove_nans.items():
+                if var not in ts.columns:
+                    continue
+                values = ts[var].to_numpy()
+                if np.isin(values, list(to_replace)).any():
+                    ts[var] = _replace_values(values.copy(), to_replace)
 
         if not self.drop_tz:
             ts.index = ts.index.tz_localize('UTC')
@@ -552,7 +688,7 @@ class C3STs(GriddedNcOrthoMultiTs):
 
         return ts
 
-    def read_cell(self, cell, var='sm') -> pd.DataFrame:
+    def read_cell(self, cell, var='sm', locations=None) -> pd.DataFrame:
         """
         Read all time series for a single variable in the selected cell.
 
@@ -562,26 +698,79 @@ class C3STs(GriddedNcOrthoMultiTs):
             Cell number as in the c3s grid
         var : str, optional (default: 'sm')
             Name of the variable to read.
+        locations : list or np.ndarray, optional (default: None)
+            Location ids (gpis) in the cell to read. Only these time series
+            are read from the file. All of them must be in the cell file.
+            By default all locations are read.
+
+        Returns
+        -------
+        data : pd.DataFrame
+            Time series of the variable, one column per location id. The
+            columns are in the order of the locations in the cell file (also
+            when a subset of locations is passed).
+
+        Raises
+        ------
+        ValueError
+            If any of the passed locations is not in the cell file.
         """
 
         file_path = os.path.join(self.path, '{}.nc'.format("%04d" % (cell,)))
-        with nc.Dataset(file_path) as ncfile:
+        with Dataset(file_path) as ncfile:
+            # coordinates have no fill values, don't create masked arrays
+            for coord in ['location_id', 'time']:
+                ncfile.variables[coord].set_auto_mask(False)
+
             loc_id = ncfile.variables['location_id'][:]
             time = ncfile.variables['time'][:]
             unit_time = ncfile.variables['time'].units
-            delta = lambda t: timedelta(t)
-            vfunc = np.vectorize(delta)
-            since = pd.Timestamp(unit_time.split('since ')[1])
-            time = since + vfunc(time)
-
-            variable = ncfile.variables[var][:]
-            variable = np.transpose(variable)
-            data = pd.DataFrame(variable, columns=loc_id, index=time)
+            unit, since = unit_time.split(' since ')
+            time = pd.Timestamp(since) + pd.to_timedelta(time, unit=unit.strip())
+
+            if locations is None:
+                variable = ncfile.variables[var][:]
+            else:
+                missing = np.setdiff1d(locations, loc_id)
+                if missing.size > 0:
+                    raise ValueError(f"Locations {missing} are not in "
+                                     f"cell {cell}")
+                # only read the (sorted) rows of the selected locations
+                loc_idx = np.flatnonzero(np.isin(loc_id, locations))
+                loc_id = loc_id[loc_idx]
+                # read each run of consecutive rows as one slab
+                runs = np.split(loc_idx, np.flatnonzero(np.diff(loc_idx) != 1) + 1)
+                slabs = [ncfile.variables[var][r[0]:r[-1] + 1, :]
+                         for r in runs if r.size > 0]
+                if len(slabs) == 0:
+                    variable = ncfile.variables[var][0:0, :]
+                elif len(slabs) == 1:
+                    variable = slabs[0]
+                else:
+                    variable = np.ma.concatenate(slabs)
+
+            # resolve the mask here, so that pandas does not have to check
+            # and upcast the masked array
+            if np.ma.is_masked(variable):
+                if not np.issubdtype(variable.dtype, np.floating):
+                    # small ints (flags) fit exactly into float32
+                    variable = variable.astype(
+                        np.promote_types(variable.dtype, np.float32))
+                variable = variable.filled(np.nan)
+            else:
+                variable = np.ma.getdata(variable)
+
+            # replace in place on the plain array
             if self.remove_nans:
                 if self.remove_nans == True:
-                    data = data.replace(-9999, np.nan)
+                    variable = _replace_values(variable, {-9999.: np.nan})
                 else:
-                    data = data.replace(self.remove_nans)
+                    variable = _replace_values(variable,
+                                               self.remove_nans.get(var, {}))
+
+            # variable is (locations, time), the transpose is a view and is
+            # stored as the only block of the frame without a copy
+            data = pd.DataFrame(variable.T, columns=loc_id, index=time, copy=False)
             return data
 
     def iter_ts(self, **kwargs):
@@ -7,17 +7,26 @@ time series format using the repurpose package
 import os
 import sys
 import argparse
+import warnings
 from datetime import datetime
+from inspect import signature
 
-import pandas as pd
 from repurpose.img2ts import Img2Ts
-from c3s_sm.interface import C3S_Nc_Img_Stack, fntempl
-import c3s_sm.metadata as metadata
-from c3s_sm.metadata import C3S_daily_tsatt_nc, C3S_dekmon_tsatt_nc
-from smecv_grid.grid import SMECV_Grid_v052
-from parse import parse
+from c3s_sm.interface import C3S_Nc_Img_Stack, fntempl, c3s_grid, \
+    _template_affixes
+from c3s_sm.metadata import C3S_daily_tsatt_nc, C3S_dekmon_tsatt_nc, \
+    TS_ATTRS_BY_VERSION
+from parse import Parser
 from netCDF4 import Dataset
 
+_fntempl_parser = Parser(fntempl)
+# fixed start and end of the template, to skip other files quickly
+_fntempl_prefix, _fntempl_suffix = _template_affixes(fntempl)
+
+# supported date string formats by string length
+_date_formats = {10: '%Y-%m-%d', 16: '%Y-%m-%dT%H:%M'}
+_true_strings = frozenset(['true', 't', '1', 'yes', 'y'])
+
 def mkdate(datestring):
     """
     Create date string.
@@ -32,16 +41,12 @@ def mkdate(datestring):
     datestr : datetime
         Date string as datetime.
     """
-    if len(datestring) == 10:
-        return datetime.strptime(datestring, '%Y-%m-%d')
-    if len(datestring) == 16:
-        return datetime.strptime(datestring, '%Y-%m-%dT%H:%M')
+    if len(datestring) not in _date_formats:
+        raise ValueError(f"Unsupported date format: {datestring}")
+    return datetime.strptime(datestring, _date_formats[len(datestring)])
 
 def str2bool(val):
-    if val in ['True', 'true', 't', 'T', '1']:
-        return True
-    else:
-        return False
+    return val.strip().lower() in _true_strings
 
 def parse_filename(data_dir):
     """
@@ -63,21 +68,65 @@ def parse_filename(data_dir):
 
     for curr, subdirs, files in os.walk(data_dir):
         for f in sorted(files):
-            file_args = parse(fntempl, f)
+            fname = f.lower()
+            if not (fname.startswith(_fntempl_prefix) and
+                    fname.endswith(_fntempl_suffix)):
+                continue
+            file_args = _fntempl_parser.parse(f)
             if file_args is None:
                 continue
             else:
                 file_args = file_args.named
                 file_args['datetime'] = '{datetime}'
-                file_vars = Dataset(os.path.join(curr,f)).variables.keys()
-                return file_args, list(file_vars)
+                with Dataset(os.path.join(curr, f)) as ds:
+                    file_vars = list(ds.variables.keys())
+                return file_args, file_vars
 
     raise IOError('No file name in passed directory fits to template')
 
 
+def _ts_attrs(version, temp_res, cdr_type, sensor_type):
+    """
+    Create the time series metadata object for a product.
+
+    Parameters
+    ----------
+    version : str
+        Product version, e.g. v201912
+    temp_res : str
+        Temporal resolution of the product: daily, dekadal or monthly
+    cdr_type : str
+        TCDR or ICDR
+    sensor_type : str
+        active, passive or combined
+
+    Returns
+    -------
+    attrs : C3S_daily_tsatt_nc or C3S_dekmon_tsatt_nc
+        Global and time series attributes for the product.
+
+    Raises
+    ------
+    NotImplementedError
+        If there are no attributes for the passed version.
+    """
+    if version not in TS_ATTRS_BY_VERSION:
+        raise NotImplementedError(
+            f"No metadata available for version {version}, "
+            f"use ignore_meta to reshuffle without metadata.")
+    cls = TS_ATTRS_BY_VERSION[version]
+
+    if temp_res.upper() == 'DAILY':
+        return C3S_daily_tsatt_nc(cdr_type=cdr_type, sensor_type=sensor_type,
+                                  cls=cls)
+    else:
+        return C3S_dekmon_tsatt_nc(product_temp_res=temp_res, cdr_type=cdr_type,
+                                   sensor_type=sensor_type, cls=cls)
+
+
 def reshuffle(input_root, outputpath, startdate, enddate,
               parameters=None, land_points=True, bbox=None,
-              ignore_meta=False, imgbuffer=500):
+              ignore_meta=False, imgbuffer=500, n_proc=1):
     """
     Reshuffle method applied to C3S data.
 
@@ -104,12 +153,15 @@ def reshuffle(input_root, outputpath, startdate, enddate,
         version is not yet supported.
     imgbuffer: int, optional (default: 50)
         How many images to read at once before writing time series.
+    n_proc: int, optional (default: 1)
+        Number of processes to read images and write time series in parallel.
+        Requires a repurpose version that supports parallel processing.
     """
 
     if land_points:
-        grid = SMECV_Grid_v052('land')
+        grid = c3s_grid('land')
     else:
-        grid = SMECV_Grid_v052(None)
+        grid = c3s_grid(None)
 
     if bbox:
         grid = grid.subgrid_from_bbox(*bbox)
@@ -129,22 +181,15 @@ def reshuffle(input_root, outputpath, startdate, enddate,
     if not ignore_meta:
         prod_args = input_dataset.fname_args
 
-        kwargs = {'sensor_type': prod_args['prod'].lower(),
-                  'cdr_type': prod_args['cdr'],
-                  'product_temp_res':  prod_args['temp'],
-                  'cls': getattr(metadata, f"C3S_SM_TS_Attrs_{prod_args['vers']}")}
+        attrs = _ts_attrs(version=prod_args['vers'],
+                          temp_res=prod_args['temp'],
+                          cdr_type=prod_args['cdr'],
+                          sensor_type=prod_args['prod'].lower())
 
-        if prod_args['temp'].upper() == 'DAILY':
-            kwargs.pop('product_temp_res')
-            attrs = C3S_daily_tsatt_nc(**kwargs)
-        else:
-            attrs = C3S_dekmon_tsatt_nc(**kwargs)
-
-        ts_attributes = {}
         global_attributes = attrs.global_attr
-
-        for var in parameters:
-            ts_attributes.update(attrs.ts_attributes[var])
+        # Img2Ts needs an entry for each variable in a nested dict
+        ts_attributes = {var: attrs.ts_attributes.get(var, {})
+                         for var in parameters}
     else:
         global_attributes = None
         ts_attributes = None
@@ -152,11 +197,20 @@ def reshuffle(input_root, outputpath, startdate, enddate,
     if not os.path.exists(outputpath):
         os.makedirs(outputpath)
 
+    img2ts_kwargs = {}
+    if n_proc > 1:
+        if 'n_proc' in signature(Img2Ts).parameters:
+            img2ts_kwargs['n_proc'] = n_proc
+        else:
+            warnings.warn("Installed repurpose version does not support "
+                          "parallel processing, use a single process.")
+
     reshuffler = Img2Ts(input_dataset=input_dataset, outputpath=outputpath,
                         startdate=startdate, enddate=enddate, input_grid=grid,
                         imgbuffer=imgbuffer, cellsize_lat=5.0,
                         cellsize_lon=5.0, global_attr=global_attributes, zlib=True,
-                        unlim_chunksize=1000, ts_attributes=ts_attributes)
+                        unlim_chunksize=1000, ts_attributes=ts_attributes,
+                        **img2ts_kwargs)
     reshuffler.calc()
 
 
@@ -194,7 +248,7 @@ def parse_args(args):
     parser.add_argument("--parameters", metavar="parameters", default=None,
                         nargs="+",
                         help=("Parameters to reshuffle into time series format. "
-                              "E.g. sm for creating soil moisture time series."
+                              "E.g. sm for creating soil moisture time series. "
                               "If None are passed, all variables from the first image file in the path are used."))
 
     parser.add_argument("--land_points", type=str2bool, default='False',
@@ -207,7 +261,7 @@ def parse_args(args):
                               "of area to reshuffle (WGS84)"))
 
     parser.add_argument("--ignore_meta", type=str2bool, default='False',
-                        help=("Do not apply image metadata to the time series."
+                        help=("Do not apply image metadata to the time series. "
                               "E.g. for unsupported data versions."))
 
     parser.add_argument("--imgbuffer", type=int, default=200,
@@ -215,6 +269,10 @@ def parse_args(args):
                               "numbers make the conversion faster but "
                               "consume more memory."))
 
+    parser.add_argument("--n_proc", type=int, default=1,
+                        help=("Number of parallel processes to read images "
+                              "and write time series with."))
+
     args = parser.parse_args(args)
     # set defaults that can not be handled by argparse
 
@@ -242,7 +300,8 @@ def main(args):
               land_points=args.land_points,
               bbox=args.bbox,
               ignore_meta=args.ignore_meta,
-              imgbuffer=args.imgbuffer)
+              imgbuffer=args.imgbuffer,
+              n_proc=args.n_proc)
 
 def run():
     main(sys.argv[1:])
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from c3s_sm.interface import C3SImg
+from c3s_sm.interface import C3SImg, c3s_grid
 import os
 import numpy.testing as nptest
 from smecv_grid.grid import SMECV_Grid_v052
@@ -133,3 +133,31 @@ def test_1Dreading(subgrid):
     assert ref_lon == test_loc_lonlat[0]
     nptest.assert_almost_equal(ref_sm, 0.360762, 5)
     assert(image.metadata['sm']['long_name'] == 'Volumetric Soil Moisture')
+
+def test_shared_index_cache_different_subgrids():
+    # readers of different subgrids can share the index cache
+    file = os.path.join(os.path.join(os.path.dirname(__file__),
+                        'c3s_sm-test-data', 'img', 'ICDR', '060_dailyImages', 'combined', '2017',
+                        'C3S-SOILMOISTURE-L3S-SSMV-COMBINED-DAILY-20170701000000-ICDR-v201706.0.0.nc'))
+
+    index_cache = {}
+    subgrids = [SMECV_Grid_v052('land'),
+                SMECV_Grid_v052('land').subgrid_from_bbox(74, 13, 78, 15)]
+    for subgrid in subgrids:
+        shared = C3SImg(file, parameters='sm', flatten=True, subgrid=subgrid,
+                        index_cache=index_cache).read()
+        own = C3SImg(file, parameters='sm', flatten=True, subgrid=subgrid).read()
+        assert shared.lon.size == subgrid.activegpis.size
+        nptest.assert_equal(shared.data['sm'], own.data['sm'])
+
+    assert len(index_cache) == 2
+
+def test_c3s_grid_cached():
+    grid = c3s_grid('land')
+    assert c3s_grid('land') is grid
+    assert c3s_grid(None) is not grid
+    assert c3s_grid(None).activegpis.size > grid.activegpis.size
+    # the shared grid can not be changed through its arrays
+    for arr in [grid.arrlon, grid.arrlat, grid.activearrlon,
+                grid.activearrlat, grid.gpis, grid.activegpis]:
+        assert not arr.flags.writeable
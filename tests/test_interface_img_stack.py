@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from c3s_sm.interface import C3S_Nc_Img_Stack
+from c3s_sm.interface import C3S_Nc_Img_Stack, fntempl, _template_affixes
 from datetime import datetime
 import os
 import numpy.testing as nptest
@@ -7,6 +7,11 @@ from pygeobase.object_base import  Image
 import numpy as np
 from smecv_grid.grid import SMECV_Grid_v052
 
+def test_template_affixes():
+    assert _template_affixes(fntempl) == ('c3s-soilmoisture-l3s-ssm', '.nc')
+    assert _template_affixes('{{a}}_{b}.nc') == ('{', '.nc')
+    assert _template_affixes('a_{b}') == ('a_', '')
+
 def test_c3s_timestamp_for_daterange():
     parameters = ['sm', 'sm_noise']
 
@@ -25,6 +30,42 @@ def test_c3s_timestamp_for_daterange():
                        datetime(2000, 1, 4),
                        datetime(2000, 1, 5)]
 
+def test_c3s_timestamp_for_daterange_dekadal():
+    path = os.path.join(os.path.dirname(__file__),
+                        'c3s_sm-test-data', 'img', 'ICDR', '062_dekadalImages', 'passive')
+
+    ds = C3S_Nc_Img_Stack(path, 'sm')
+
+    # start in the middle of a dekad, across month and year ends
+    tstamps = ds.tstamps_for_daterange(datetime(2019, 12, 25),
+                                       datetime(2020, 3, 1))
+    assert tstamps == [datetime(2019, 12, 21),
+                       datetime(2020, 1, 1),
+                       datetime(2020, 1, 11),
+                       datetime(2020, 1, 21),
+                       datetime(2020, 2, 1),
+                       datetime(2020, 2, 11),
+                       datetime(2020, 2, 21),
+                       datetime(2020, 3, 1)]
+
+    tstamps = ds.tstamps_for_daterange(datetime(2019, 10, 15),
+                                       datetime(2019, 11, 5))
+    assert tstamps == [datetime(2019, 10, 11),
+                       datetime(2019, 10, 21),
+                       datetime(2019, 11, 1)]
+
+def test_c3s_timestamp_for_daterange_monthly():
+    path = os.path.join(os.path.dirname(__file__),
+                        'c3s_sm-test-data', 'img', 'TCDR', '061_monthlyImages', 'combined')
+
+    ds = C3S_Nc_Img_Stack(path, 'sm')
+
+    tstamps = ds.tstamps_for_daterange(datetime(2019, 10, 15),
+                                       datetime(2020, 1, 31))
+    assert tstamps == [datetime(2019, 11, 1),
+                       datetime(2019, 12, 1),
+                       datetime(2020, 1, 1)]
+
 def test_c3s_img_stack_single_img_reading():
     parameters = ['sm']
 
@@ -104,6 +145,28 @@ def test_c3s_img_stack_multiple_img_reading_ICDR():
             nptest.assert_almost_equal(img.data['sm'][row, col], 0.29522, 4)
 
 
+def test_c3s_img_stack_shared_index_cache():
+    startdate, enddate = datetime(2017,7,1), datetime(2017,12,1)
+
+    path = os.path.join(os.path.dirname(__file__),
+                        'c3s_sm-test-data', 'img', 'ICDR', '061_monthlyImages', 'passive')
+
+    subgrid = SMECV_Grid_v052('land').subgrid_from_bbox(-30,30,30,70)
+    ds = C3S_Nc_Img_Stack(path, ['sm'], subgrid=subgrid, subpath_templ=None)
+
+    n_imgs = 0
+    for img in ds.iter_images(startdate, enddate):
+        n_imgs += 1
+    assert n_imgs > 1
+
+    # the subgrid index was computed once and shared by all image readers
+    index_cache = ds.ioclass_kws['index_cache']
+    assert len(index_cache) == 1
+    index = list(index_cache.values())[0]
+    assert index['subgrid'] is subgrid
+    assert not index['inactive_mask'].flags.writeable
+
+
 
 if __name__ == '__main__':
     test_c3s_img_stack_multiple_img_reading_TCDR()
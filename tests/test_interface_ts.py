@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import os
+from tempfile import TemporaryDirectory
+import numpy as np
+import numpy.testing as nptest
+import pandas as pd
+from netCDF4 import Dataset
+from pygeogrids.grids import BasicGrid
+from pygeogrids.netcdf import save_grid
+
+from c3s_sm.interface import C3STs
+
+def _write_cell(ts_path):
+    # small cell file with 4 locations and 3 time stamps
+    gpis = np.array([10, 11, 12, 13])
+    grid = BasicGrid(np.array([0.125, 0.375, 0.625, 0.875]),
+                     np.full(4, 0.125), gpis=gpis).to_cell_grid(cellsize=5.)
+    save_grid(os.path.join(ts_path, 'grid.nc'), grid)
+    cell = grid.gpi2cell(10)
+
+    sm = np.array([[0.1, -1., 0.3],
+                   [0.2, 0.2, -1.],
+                   [-1., 0.4, 0.4],
+                   [0.5, 0.5, 0.5]], dtype=np.float32)
+    flag = np.ma.masked_equal(np.array([[0, 1, -1],
+                                        [0, 0, 0],
+                                        [2, 0, 0],
+                                        [0, 0, 1]], dtype=np.int16), -1)
+    nobs = np.array([[1, 2, 3],
+                     [1, 2, 3],
+                     [1, 2, 3],
+                     [1, 2, 3]], dtype=np.int16)
+
+    file_path = os.path.join(ts_path, '{}.nc'.format("%04d" % (cell,)))
+    with Dataset(file_path, 'w') as ncfile:
+        ncfile.createDimension('locations', gpis.size)
+        ncfile.createDimension('time', 3)
+        ncfile.createVariable('location_id', 'i8', ('locations',))[:] = gpis
+        time = ncfile.createVariable('time', 'f8', ('time',))
+        time.units = 'days since 1978-11-01 00:00:00'
+        time[:] = [0., 1., 2.]
+        ncfile.createVariable('sm', 'f4', ('locations', 'time'))[:] = sm
+        ncfile.createVariable('flag', 'i2', ('locations', 'time'),
+                              fill_value=-1)[:] = flag
+        ncfile.createVariable('nobs', 'i2', ('locations', 'time'))[:] = nobs
+
+    return cell
+
+def test_read_cell_subset_of_locations():
+    with TemporaryDirectory() as ts_path:
+        cell = _write_cell(ts_path)
+        ds = C3STs(ts_path)
+
+        cell_data = ds.read_cell(cell, 'sm')
+        assert cell_data.columns.tolist() == [10, 11, 12, 13]
+        assert cell_data.index[0] == pd.Timestamp('1978-11-01')
+
+        # not contiguous in the file, read in file order
+        cell_subset = ds.read_cell(cell, 'sm', locations=[13, 10, 12])
+        pd.testing.assert_frame_equal(cell_subset, cell_data[[10, 12, 13]])
+
+def test_read_cell_empty_locations():
+    with TemporaryDirectory() as ts_path:
+        cell = _write_cell(ts_path)
+        ds = C3STs(ts_path)
+
+        cell_data = ds.read_cell(cell, 'sm', locations=[])
+        assert cell_data.shape == (3, 0)
+        assert cell_data.index[-1] == pd.Timestamp('1978-11-03')
+
+def test_read_cell_remove_nans_dict():
+    with TemporaryDirectory() as ts_path:
+        cell = _write_cell(ts_path)
+        ds = C3STs(ts_path, remove_nans={'sm': -1.})
+
+        cell_data = ds.read_cell(cell, 'sm')
+        assert cell_data.dtypes.unique().tolist() == [np.float32]
+        assert not (cell_data.values == -1.).any()
+        nptest.assert_almost_equal(cell_data[10].values, [0.1, np.nan, 0.3])
+        nptest.assert_almost_equal(cell_data[13].values, [0.5, 0.5, 0.5])
+
+        # variables not in the dict are not changed
+        nobs = ds.read_cell(cell, 'nobs')
+        assert nobs.dtypes.unique().tolist() == [np.int16]
+
+def test_read_cell_masked_int_to_float32():
+    with TemporaryDirectory() as ts_path:
+        cell = _write_cell(ts_path)
+        ds = C3STs(ts_path)
+
+        # masked values in an int variable are filled with nan
+        flag = ds.read_cell(cell, 'flag')
+        assert flag.dtypes.unique().tolist() == [np.float32]
+        nptest.assert_almost_equal(flag[10].values, [0., 1., np.nan])
+        nptest.assert_almost_equal(flag[12].values, [2., 0., 0.])
+
+        # an int variable without masked values keeps its type
+        flag = ds.read_cell(cell, 'flag', locations=[11, 12])
+        assert flag.dtypes.unique().tolist() == [np.int16]
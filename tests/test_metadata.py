@@ -2,6 +2,8 @@
 
 import pytest
 from c3s_sm.metadata import C3S_daily_tsatt_nc, C3S_SM_TS_Attrs_v201912, C3S_dekmon_tsatt_nc, C3S_SM_TS_Attrs
+from c3s_sm.metadata import TS_ATTRS_BY_VERSION
+import c3s_sm.metadata
 
 @pytest.mark.parametrize("sens", ["active", "passive", "combined"])
 def test_daily_metadata_default(sens):
@@ -83,3 +85,25 @@ def test_C3s_dekmon_tsatt_nc():
     assert dob.ts_attributes['nobs'] == {'full_name': 'Number of valid observation'}
 
     assert dob.ts_attributes['sensor']['flag_values'].size == 11
+
+def test_flag_arrays_shared():
+    attr1 = C3S_SM_TS_Attrs_v201912('active')
+    attr2 = C3S_SM_TS_Attrs_v201912('passive')
+    attr1.sensor_flag()
+    attr2.sensor_flag()
+
+    assert attr1.sensor_flag_values is attr2.sensor_flag_values
+    assert not attr1.sensor_flag_meanings.flags.writeable
+
+def test_ts_attrs_by_version():
+    assert TS_ATTRS_BY_VERSION['v201912'] is C3S_SM_TS_Attrs_v201912
+    assert TS_ATTRS_BY_VERSION['v201912']('active').version == 'v201912'
+
+def test_all_ts_attrs_versions_registered():
+    # every version specific class in the module must be in the lookup dict
+    classes = {name: cls for name, cls in vars(c3s_sm.metadata).items()
+               if name.startswith('C3S_SM_TS_Attrs_v')}
+    assert len(classes) > 0
+    for name, cls in classes.items():
+        assert TS_ATTRS_BY_VERSION[name.split('_')[-1]] is cls
+    assert len(TS_ATTRS_BY_VERSION) == len(classes)
@@ -5,12 +5,69 @@ import glob
 from tempfile import TemporaryDirectory
 import numpy as np
 import numpy.testing as nptest
+from datetime import datetime
 
-from c3s_sm.reshuffle import main, parse_filename
+from c3s_sm.reshuffle import main, parse_filename, mkdate, str2bool, _ts_attrs
+from c3s_sm.reshuffle import reshuffle
+import c3s_sm.reshuffle
 from c3s_sm.interface import C3STs
+from c3s_sm.metadata import C3S_daily_tsatt_nc, C3S_SM_TS_Attrs_v201912
+from netCDF4 import Dataset
 import pandas as pd
 import pytest
 
+def test_mkdate():
+    assert mkdate('2019-10-01') == datetime(2019, 10, 1)
+    assert mkdate('2019-10-01T12:30') == datetime(2019, 10, 1, 12, 30)
+    with pytest.raises(ValueError):
+        mkdate('20191001')
+
+def test_str2bool():
+    for val in ['True', 'true', 'TRUE', 't', '1', ' yes ']:
+        assert str2bool(val)
+    for val in ['False', 'f', '0', 'no', '']:
+        assert not str2bool(val)
+
+def test_ts_attrs_unsupported_version():
+    with pytest.raises(NotImplementedError):
+        _ts_attrs(version='v000000', temp_res='DAILY', cdr_type='TCDR',
+                  sensor_type='active')
+
+@pytest.mark.parametrize("n_proc_supported", [True, False])
+def test_reshuffle_n_proc(monkeypatch, n_proc_supported):
+    # check that n_proc is passed to repurpose if it supports it
+    passed = {}
+
+    class Img2TsParallel:
+        def __init__(self, n_proc=1, **kwargs):
+            passed['n_proc'] = n_proc
+        def calc(self):
+            pass
+
+    class Img2TsSerial:
+        def __init__(self, **kwargs):
+            passed.update(kwargs)
+        def calc(self):
+            pass
+
+    monkeypatch.setattr(c3s_sm.reshuffle, 'Img2Ts',
+                        Img2TsParallel if n_proc_supported else Img2TsSerial)
+    monkeypatch.setattr(c3s_sm.reshuffle, 'C3S_Nc_Img_Stack',
+                        lambda **kwargs: None)
+
+    with TemporaryDirectory() as ts_path:
+        kwargs = dict(input_root=ts_path, outputpath=ts_path,
+                      startdate=datetime(2000, 1, 1),
+                      enddate=datetime(2000, 1, 2), parameters=['sm'],
+                      land_points=False, ignore_meta=True, n_proc=2)
+        if n_proc_supported:
+            reshuffle(**kwargs)
+            assert passed['n_proc'] == 2
+        else:
+            with pytest.warns(UserWarning):
+                reshuffle(**kwargs)
+            assert 'n_proc' not in passed
+
 def test_parse_filename():
     inpath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                           "c3s_sm-test-data", "img2ts", "combined")
@@ -26,7 +83,7 @@ def test_parse_filename():
 
     assert file_vars == [u'lat', u'lon', u'time', u'nobs', u'sensor', u'freqbandID', u'sm']
 
-def test_reshuffle_TCDR_daily_multiple_params():
+def _reshuffle_TCDR_daily_active(ts_path):
     inpath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                           "c3s_sm-test-data", "img2ts", "active")
     startdate = "1991-08-05"
@@ -35,10 +92,13 @@ def test_reshuffle_TCDR_daily_multiple_params():
     land_points = 'True'
     bbox = ['--bbox', '70', '10', '80', '20']
 
+    args = [inpath, ts_path, startdate, enddate]  + \
+           parameters + ['--land_points', land_points] + bbox
+    main(args)
+
+def test_reshuffle_TCDR_daily_multiple_params():
     with TemporaryDirectory() as ts_path:
-        args = [inpath, ts_path, startdate, enddate]  + \
-               parameters + ['--land_points', land_points] + bbox
-        main(args)
+        _reshuffle_TCDR_daily_active(ts_path)
 
         assert len(glob.glob(os.path.join(ts_path, "*.nc"))) == 5
 
@@ -59,6 +119,46 @@ def test_reshuffle_TCDR_daily_multiple_params():
 
         ds.close()
 
+def test_reshuffle_TCDR_daily_read_cell():
+    with TemporaryDirectory() as ts_path:
+        _reshuffle_TCDR_daily_active(ts_path)
+
+        ds = C3STs(ts_path, remove_nans=True, parameters=['sm', 'sm_uncertainty'],
+                   ioclass_kws={'read_bulk': True, 'read_dates': False})
+        ts = ds.read(602942)
+
+        # reading the whole cell gives the same time series
+        cell = ds.grid.gpi2cell(602942)
+        cell_data = ds.read_cell(cell, 'sm')
+        assert cell_data.index.size == ts.index.size
+        nptest.assert_almost_equal(cell_data[602942].values, ts['sm'].values)
+
+        # subset of locations, in order of the file
+        a, b = cell_data.columns[0], cell_data.columns[-1]
+        cell_subset = ds.read_cell(cell, 'sm', locations=[b, a])
+        pd.testing.assert_frame_equal(cell_subset, cell_data[[a, b]])
+        with pytest.raises(ValueError):
+            ds.read_cell(cell, 'sm', locations=[a, -1])
+
+        ds.close()
+
+def test_reshuffle_TCDR_daily_ts_attributes():
+    with TemporaryDirectory() as ts_path:
+        _reshuffle_TCDR_daily_active(ts_path)
+
+        # each variable gets its own attributes
+        attrs = C3S_daily_tsatt_nc(cdr_type='TCDR', sensor_type='active',
+                                   cls=C3S_SM_TS_Attrs_v201912)
+        cell_file = [f for f in glob.glob(os.path.join(ts_path, "*.nc"))
+                     if os.path.basename(f) != 'grid.nc'][0]
+        with Dataset(cell_file) as cell:
+            for var in ['sm', 'sm_uncertainty']:
+                assert cell.variables[var].full_name == \
+                       attrs.ts_attributes[var]['full_name']
+                assert cell.variables[var].units == \
+                       attrs.ts_attributes[var]['units']
+                assert 'flag_values' not in cell.variables[var].ncattrs()
+
 @pytest.mark.parametrize("ignore_meta", [True, False])
 def test_reshuffle_ICDR_monthly_single_param(ignore_meta):
     inpath = os.path.join(os.path.dirname(os.path.abspath(__file__)),